@@ -0,0 +1,404 @@
+"""端對端壓力測試：以假模型啟動 FastAPI app，量測 /chat 與 /chat/stream 的吞吐量與延遲
+
+聊天模型與 embedding 模型皆以可設定延遲的假模型取代，不需呼叫任何付費服務。
+
+    python -m benchmarks.loadtest --concurrency 8 32 64 --requests 500 --output reports/loadtest.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tomllib
+import uuid
+from collections import defaultdict
+from collections.abc import AsyncIterator, Iterator
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+from unittest.mock import patch
+
+import httpx
+from langchain_core.callbacks import AsyncCallbackManagerForLLMRun, CallbackManagerForLLMRun
+from langchain_core.embeddings import DeterministicFakeEmbedding
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AIMessage, AIMessageChunk, BaseMessage, HumanMessage
+from langchain_core.outputs import ChatGeneration, ChatGenerationChunk, ChatResult
+
+from benchmarks.ingestion import make_words, percentile
+
+WORKLOADS = ("chat", "tool", "upload", "stream")
+
+
+class ScriptedChatModel(BaseChatModel):
+    """依照訊息中的標記回應：[tool] 呼叫 search_memory、[upload] 呼叫 save_memory，其餘直接回答"""
+
+    latency: float = 0.2
+    tokens_per_second: float = 50.0
+    answer_tokens: int = 40
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted"
+
+    def bind_tools(self, tools: Any, **kwargs: Any) -> "ScriptedChatModel":
+        return self
+
+    def _respond(self, messages: list[BaseMessage]) -> AIMessage:
+        # 只比對訊息開頭：摘要 prompt 會引用先前的使用者訊息，不可被當成工具請求
+        last = messages[-1]
+        if isinstance(last, HumanMessage) and last.text.startswith("[tool]"):
+            args = {"queries": [make_words(random.Random(), 3), make_words(random.Random(), 3)]}
+            return AIMessage("", tool_calls=[{"name": "search_memory", "args": args, "id": uuid.uuid4().hex}])
+        if isinstance(last, HumanMessage) and last.text.startswith("[upload]"):
+            return AIMessage("", tool_calls=[{"name": "save_memory", "args": {}, "id": uuid.uuid4().hex}])
+        return AIMessage(make_words(random.Random(), self.answer_tokens))
+
+    def _tool_call_chunk(self, message: AIMessage) -> ChatGenerationChunk:
+        tool_call = message.tool_calls[0]
+        return ChatGenerationChunk(
+            message=AIMessageChunk(
+                content="",
+                tool_call_chunks=[
+                    {"name": tool_call["name"], "args": json.dumps(tool_call["args"]), "id": tool_call["id"]}
+                ],
+            )
+        )
+
+    def _generate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._respond(messages)
+        time.sleep(self.latency + len(message.text.split()) / self.tokens_per_second)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> ChatResult:
+        message = self._respond(messages)
+        await asyncio.sleep(self.latency + len(message.text.split()) / self.tokens_per_second)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    def _stream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: CallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> Iterator[ChatGenerationChunk]:
+        message = self._respond(messages)
+        time.sleep(self.latency)
+
+        if message.tool_calls:
+            yield self._tool_call_chunk(message)
+            return
+
+        for word in message.text.split():
+            time.sleep(1 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+    async def _astream(
+        self,
+        messages: list[BaseMessage],
+        stop: list[str] | None = None,
+        run_manager: AsyncCallbackManagerForLLMRun | None = None,
+        **kwargs: Any,
+    ) -> AsyncIterator[ChatGenerationChunk]:
+        message = self._respond(messages)
+        await asyncio.sleep(self.latency)
+
+        if message.tool_calls:
+            yield self._tool_call_chunk(message)
+            return
+
+        for word in message.text.split():
+            await asyncio.sleep(1 / self.tokens_per_second)
+            chunk = ChatGenerationChunk(message=AIMessageChunk(content=word + " "))
+            if run_manager:
+                await run_manager.on_llm_new_token(chunk.text, chunk=chunk)
+            yield chunk
+
+
+class SlowFakeEmbedding(DeterministicFakeEmbedding):
+    """帶有固定延遲的假 embedding"""
+
+    latency: float = 0.05
+
+    async def aembed_documents(self, texts: list[str]) -> list[list[float]]:
+        await asyncio.sleep(self.latency)
+        return self.embed_documents(texts)
+
+    async def aembed_query(self, text: str) -> list[float]:
+        await asyncio.sleep(self.latency)
+        return self.embed_query(text)
+
+
+def serve(args: argparse.Namespace) -> None:
+    import uvicorn
+
+    # 以假模型取代 provider；向量資料庫使用 in-process store
+    os.environ.update(
+        BACKEND_PORT=str(args.port),
+        VECTOR_DB_URL="",
+        VECTOR_DB_PROVIDER="memory",
+        VECTOR_DB_COLLECTION="loadtest",
+        EMBEDDING_PROVIDER="ollama",
+        EMBEDDING_MODEL="fake",
+        LLM_PROVIDER="ollama",
+        LLM_MODEL="fake",
+    )
+    chat_model = ScriptedChatModel(
+        latency=args.llm_latency,
+        tokens_per_second=args.tokens_per_second,
+        answer_tokens=args.answer_tokens,
+    )
+    embedding_model = SlowFakeEmbedding(size=args.embedding_size, latency=args.embedding_latency)
+
+    with (
+        patch("src.agent.chat.get_llm_model", return_value=chat_model),
+        patch("src.database.vectordb.get_embedding_model", return_value=embedding_model),
+    ):
+        from main import app
+
+        uvicorn.run(app, host="127.0.0.1", port=args.port, log_level="warning")
+
+
+def read_rss(pid: int) -> int | None:
+    # 讀取 process 的 RSS (bytes)，僅支援 Linux
+    try:
+        with open(f"/proc/{pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) * 1024
+    except OSError:
+        return None
+    return None
+
+
+async def send(client: httpx.AsyncClient, workload: str, thread_id: str) -> tuple[float, float]:
+    # 回傳 (time to first token, total latency)；非串流請求兩者相同
+    query = make_words(random.Random(), 8)
+    data = {"thread_id": thread_id, "query": query}
+    start = time.perf_counter()
+
+    if workload == "stream":
+        ttft: float | None = None
+        async with client.stream("POST", "/chat/stream", data=data) as response:
+            response.raise_for_status()
+            async for chunk in response.aiter_bytes():
+                if chunk and ttft is None:
+                    ttft = time.perf_counter() - start
+        total = time.perf_counter() - start
+        return (ttft if ttft is not None else total), total
+
+    files = None
+    if workload == "tool":
+        data["query"] = f"[tool] {query}"
+    elif workload == "upload":
+        data["query"] = f"[upload] {query}"
+        files = {"files": ("notes.txt", make_words(random.Random(), 2000).encode(), "text/plain")}
+
+    response = await client.post("/chat", data=data, files=files)
+    response.raise_for_status()
+    total = time.perf_counter() - start
+    return total, total
+
+
+async def run_load(args: argparse.Namespace, concurrency: int, pid: int) -> dict[str, Any]:
+    rng = random.Random(args.seed)
+    workloads, weights = zip(*args.mix.items(), strict=True)
+    schedule = rng.choices(workloads, weights=weights, k=args.requests)
+    queue: asyncio.Queue[str] = asyncio.Queue()
+    for workload in schedule:
+        queue.put_nowait(workload)
+
+    ttfts: dict[str, list[float]] = defaultdict(list)
+    totals: dict[str, list[float]] = defaultdict(list)
+    errors: dict[str, int] = defaultdict(int)
+    threads = 0
+
+    async def worker(client: httpx.AsyncClient) -> None:
+        nonlocal threads
+        turns = args.turns
+        thread_id = ""
+        while not queue.empty():
+            workload = queue.get_nowait()
+            # 每個 thread 進行 args.turns 輪對話後換新 thread
+            if turns >= args.turns:
+                thread_id, turns = uuid.uuid4().hex, 0
+                threads += 1
+            turns += 1
+            try:
+                ttft, total = await send(client, workload, thread_id)
+            except httpx.HTTPError:
+                errors[workload] += 1
+                continue
+            ttfts[workload].append(ttft)
+            totals[workload].append(total)
+
+    rss_before = read_rss(pid)
+    limits = httpx.Limits(max_connections=concurrency)
+    async with httpx.AsyncClient(base_url=args.url, timeout=args.timeout, limits=limits) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    rss_after = read_rss(pid)
+
+    def summarize(samples: list[float]) -> dict[str, float]:
+        return {
+            "p50_ms": percentile(samples, 50) * 1000,
+            "p90_ms": percentile(samples, 90) * 1000,
+            "p99_ms": percentile(samples, 99) * 1000,
+        }
+
+    completed = sum(len(samples) for samples in totals.values())
+    rss_growth = rss_after - rss_before if rss_before is not None and rss_after is not None else None
+
+    return {
+        "concurrency": concurrency,
+        "requests": args.requests,
+        "completed": completed,
+        "errors": dict(errors),
+        "threads": threads,
+        "elapsed_seconds": elapsed,
+        "throughput_rps": completed / elapsed if elapsed else None,
+        # 非串流請求的 TTFT 即為總延遲，因此只統計 stream 工作負載
+        "ttft": summarize(ttfts["stream"]),
+        "latency": summarize([t for samples in totals.values() for t in samples]),
+        "workloads": {
+            workload: {
+                "count": len(totals[workload]),
+                "ttft": summarize(ttfts[workload]),
+                **summarize(totals[workload]),
+            }
+            for workload in totals
+        },
+        "rss_before_bytes": rss_before,
+        "rss_after_bytes": rss_after,
+        "rss_growth_per_thread_bytes": rss_growth / threads if rss_growth is not None and threads else None,
+    }
+
+
+async def wait_until_ready(url: str, server: subprocess.Popen, timeout: float = 60) -> None:
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(base_url=url) as client:
+        while time.monotonic() < deadline:
+            if server.poll() is not None:
+                raise RuntimeError("Load test server exited during startup")
+            try:
+                if (await client.get("/metrics")).status_code == 200:
+                    return
+            except httpx.TransportError:
+                pass
+            await asyncio.sleep(0.2)
+    raise TimeoutError("Load test server did not become ready")
+
+
+async def drive(args: argparse.Namespace) -> None:
+    server_args = [
+        "--port", str(args.port),
+        "--llm-latency", str(args.llm_latency),
+        "--tokens-per-second", str(args.tokens_per_second),
+        "--answer-tokens", str(args.answer_tokens),
+        "--embedding-latency", str(args.embedding_latency),
+        "--embedding-size", str(args.embedding_size),
+    ]  # fmt: skip
+    server = subprocess.Popen(
+        [sys.executable, "-m", "benchmarks.loadtest", "serve", *server_args],
+        cwd=Path(__file__).parents[1],
+        stdout=subprocess.DEVNULL,
+    )
+    args.url = f"http://127.0.0.1:{args.port}"
+
+    try:
+        await wait_until_ready(args.url, server)
+        results = []
+        for concurrency in args.concurrency:
+            result = await run_load(args, concurrency, server.pid)
+            results.append(result)
+            print(
+                f"concurrency={concurrency:>4} rps={result['throughput_rps']:.1f} "
+                f"ttft p50={result['ttft']['p50_ms']:.0f}ms p99={result['ttft']['p99_ms']:.0f}ms "
+                f"latency p50={result['latency']['p50_ms']:.0f}ms p99={result['latency']['p99_ms']:.0f}ms "
+                f"errors={sum(result['errors'].values())}"
+            )
+    finally:
+        server.terminate()
+        server.wait()
+
+    with open(Path(__file__).parents[1] / "pyproject.toml", "rb") as f:
+        version = tomllib.load(f)["project"]["version"]
+
+    report = {
+        "benchmark": "loadtest",
+        "version": version,
+        "timestamp": datetime.now(UTC).isoformat(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "parameters": {
+            key: str(value) if isinstance(value, Path) else value
+            for key, value in vars(args).items()
+            if key not in ("command", "url")
+        },
+        "results": results,
+    }
+
+    if args.output is not None:
+        args.output.parent.mkdir(parents=True, exist_ok=True)
+        args.output.write_text(json.dumps(report, indent=2))
+    else:
+        print(json.dumps(report, indent=2))
+
+
+def parse_mix(value: str) -> dict[str, float]:
+    # 例如：chat=4,tool=2,upload=1,stream=3
+    mix: dict[str, float] = {}
+    for item in value.split(","):
+        name, _, weight = item.partition("=")
+        if name not in WORKLOADS:
+            raise argparse.ArgumentTypeError(f"unknown workload {name!r}, expected one of {WORKLOADS}")
+        mix[name] = float(weight or 1)
+    return mix
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="End-to-end load test for /chat and /chat/stream with fake models")
+    parser.add_argument("command", nargs="?", choices=["run", "serve"], default="run")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--llm-latency", type=float, default=0.2, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=50.0)
+    parser.add_argument("--answer-tokens", type=int, default=40)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    parser.add_argument("--embedding-size", type=int, default=768)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=200, help="requests per concurrency level")
+    parser.add_argument("--turns", type=int, default=5, help="requests per conversation thread")
+    parser.add_argument("--mix", type=parse_mix, default="chat=4,tool=2,upload=1,stream=3")
+    parser.add_argument("--timeout", type=float, default=120.0)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", type=Path, default=None, help="write JSON results to this path")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    if args.command == "serve":
+        serve(args)
+    else:
+        asyncio.run(drive(args))
@@ -1,29 +1,45 @@
 import asyncio
 import sys
 from contextlib import asynccontextmanager
+from dataclasses import asdict
 from typing import Annotated
 
 import uvicorn
-from fastapi import Depends, FastAPI, Form, UploadFile
+from fastapi import Depends, FastAPI, Form, HTTPException, Request, UploadFile
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
+from fastapi.responses import PlainTextResponse, Response, StreamingResponse
+from prometheus_client import CONTENT_TYPE_LATEST, generate_latest
 
 from src.agent.chat import ChatAgent, get_chat_agent
 from src.config import get_config
 from src.database.vectordb import get_vector_db
-from src.schemas import ChatResponse
+from src.model.cache import get_llm_cache
+from src.schemas import CacheStatsResponse, ChatResponse
 from src.services.document import get_document_service
 from src.utils.logger import setup_logging
+from src.utils.profiling import LoopLagMonitor, ProfilingMiddleware, get_profile_store
+from src.utils.sse import sse_stream
+from src.utils.telemetry import RequestDurationMiddleware, setup_tracing
 
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
     setup_logging()  # 初始化日誌
+    setup_tracing(get_config().OTEL_EXPORTER_OTLP_ENDPOINT)  # 初始化追蹤
     get_vector_db()  # 初始化資料庫
     get_chat_agent()  # 初始化模型
     get_document_service()  # 初始化檔案轉換服務
+
+    config = get_config()
+    loop_lag_monitor = LoopLagMonitor(threshold=config.LOOP_LAG_THRESHOLD)
+    if config.LOOP_LAG_MONITOR_ENABLED:
+        loop_lag_monitor.start()
+
     yield
 
+    if config.LOOP_LAG_MONITOR_ENABLED:
+        await loop_lag_monitor.stop()
+
 
 app = FastAPI(lifespan=lifespan)
 
@@ -34,6 +50,11 @@ app.add_middleware(
     allow_methods=["*"],
     allow_headers=["*"],
 )
+app.add_middleware(RequestDurationMiddleware)
+
+# 僅在 PROFILING_ENABLED 時掛載，避免影響一般請求
+if get_config().PROFILING_ENABLED:
+    app.add_middleware(ProfilingMiddleware)
 
 
 @app.post("/chat", response_model=ChatResponse)
@@ -60,6 +81,47 @@ async def chat_stream(
     )
 
 
+@app.post("/chat/events")
+async def chat_events(
+    request: Request,
+    chat_agent: Annotated[ChatAgent, Depends(get_chat_agent)],
+    thread_id: Annotated[str, Form()],
+    query: Annotated[str, Form()],
+    files: list[UploadFile] | None = None,
+):
+    config = get_config()
+    return StreamingResponse(
+        sse_stream(
+            chat_agent.astream_events(query, files, thread_id=thread_id),
+            request,
+            flush_interval=config.SSE_FLUSH_INTERVAL,
+            heartbeat_interval=config.SSE_HEARTBEAT_INTERVAL,
+        ),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@app.get("/cache/stats", response_model=CacheStatsResponse)
+def cache_stats():
+    # 統計需等待快取的 threading.Lock 並查詢 SQLite，以一般函式交由 threadpool 執行，避免阻塞 event loop
+    if (llm_cache := get_llm_cache()) is None:
+        return CacheStatsResponse(enabled=False)
+    return CacheStatsResponse(enabled=True, **asdict(llm_cache.stats))
+
+
+@app.get("/debug/profiles/{profile_id}", response_class=PlainTextResponse)
+async def get_profile(profile_id: str):
+    if not get_config().PROFILING_ENABLED or (profile := get_profile_store().get(profile_id)) is None:
+        raise HTTPException(status_code=404, detail="Profile not found")
+    return profile
+
+
+@app.get("/metrics")
+async def metrics():
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
+
 if __name__ == "__main__":
     # 兼容 Windows
     if sys.platform == "win32":
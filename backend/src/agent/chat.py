@@ -5,21 +5,31 @@ from typing import Any, cast
 
 from fastapi import UploadFile
 from langchain.agents import create_agent
-from langchain.agents.middleware import SummarizationMiddleware
 from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import AIMessage, BaseMessageChunk, HumanMessage, ToolMessage
 from langgraph.checkpoint.base import BaseCheckpointSaver
 from langgraph.checkpoint.memory import InMemorySaver
 
+from ..config import get_config
 from ..model.llm import get_llm_model
+from ..schemas import ChatEvent
+from ..utils.telemetry import span
+from .summary import ConversationSummarizer
 from .tools import query_weather, save_memory, search_memory
 from .types import ChatContext, ChatMiddleware, ChatState
 
 
 class ChatAgent:
-    def __init__(self, *, model: BaseChatModel, checkpointer: BaseCheckpointSaver):
+    def __init__(
+        self,
+        *,
+        model: BaseChatModel,
+        checkpointer: BaseCheckpointSaver,
+        summarizer: ConversationSummarizer,
+    ):
         self.model = model
         self.checkpointer = checkpointer
+        self.summarizer = summarizer
         self.agent = self._create_agent()
 
     def _create_agent(self):
@@ -37,6 +47,7 @@ class ChatAgent:
         【工具】
         - save_memory：使用者「提供檔案/內容」，並要求「記住/儲存/加到知識庫」時使用。
         - search_memory：使用者詢問「自己之前提供的資料」、「我的檔案」或提到「查詢知識庫/記憶」時使用。
+            - 問題涉及多個主題時，請在同一次呼叫中傳入多個查詢，例如：queries=["主題 A", "主題 B"]
         - query_weather：詢問天氣狀況時使用。
             - 例如：當使用者問「現在天氣」時 -> location="Taipei", current=["temperature_2m"]
             - 例如：當使用者問「未來天氣」-> location="Taipei", daily=["temperature_2m_max"], forecast_days=3
@@ -69,11 +80,6 @@ class ChatAgent:
             checkpointer=self.checkpointer,
             middleware=[
                 ChatMiddleware(),
-                SummarizationMiddleware(
-                    model=self.model,
-                    max_tokens_before_summary=1000,
-                    messages_to_keep=5,
-                ),  # type: ignore
             ],
         )
 
@@ -148,11 +154,14 @@ class ChatAgent:
     ) -> str:
         image_files, document_files = self._categorize_files(files)
         message_content = await self._prepare_message_content(query, image_files)
-        results = await self.agent.ainvoke(
-            {"messages": [HumanMessage(message_content)]},
-            {"configurable": {"thread_id": thread_id}},
-            context=ChatContext(document_files=document_files),
-        )
+        async with self.summarizer.thread_lock(thread_id):
+            with span("agent.invoke"):
+                results = await self.agent.ainvoke(
+                    {"messages": [HumanMessage(message_content)]},
+                    {"configurable": {"thread_id": thread_id}},
+                    context=ChatContext(document_files=document_files),
+                )
+        self.summarizer.schedule(self.agent, thread_id)
         message: AIMessage = results["messages"][-1]
         return self._extract_text_from_content(message.content)
 
@@ -163,28 +172,71 @@ class ChatAgent:
         *,
         thread_id: str,
     ) -> AsyncGenerator[str]:
+        async for event in self.astream_events(query, files, thread_id=thread_id):
+            if event.event == "token":
+                yield event.data["text"]
+
+    async def astream_events(
+        self,
+        query: str,
+        files: list[UploadFile] | None,
+        *,
+        thread_id: str,
+    ) -> AsyncGenerator[ChatEvent]:
         image_files, document_files = self._categorize_files(files)
         message_content = await self._prepare_message_content(query, image_files)
-        stream = self.agent.astream(
-            {"messages": [HumanMessage(message_content)]},
-            {"configurable": {"thread_id": thread_id}},
-            context=ChatContext(document_files=document_files),
-            stream_mode="messages",
-        )
+        tool_names: dict[str, str] = {}
+
+        async with self.summarizer.thread_lock(thread_id):
+            with span("agent.stream"):
+                stream = self.agent.astream(
+                    {"messages": [HumanMessage(message_content)]},
+                    {"configurable": {"thread_id": thread_id}},
+                    context=ChatContext(document_files=document_files),
+                    stream_mode=["messages", "updates"],
+                )
 
-        async for chunk in stream:
-            message, metadata = cast(tuple[BaseMessageChunk | ToolMessage, dict[str, Any]], chunk)
-            if metadata["langgraph_node"] == "model":
-                yield self._extract_text_from_content(message.content)
-            elif metadata["langgraph_node"] == "tools":
-                yield ""
-            else:
-                yield ""
+                async for mode, chunk in stream:
+                    if mode == "updates":
+                        # model 節點完成時，若有 tool call 則送出 tool_start
+                        update = cast(dict[str, Any], chunk).get("model") or {}
+                        for message in update.get("messages", []):
+                            for tool_call in getattr(message, "tool_calls", []):
+                                tool_names[tool_call["id"]] = tool_call["name"]
+                                yield ChatEvent(
+                                    event="tool_start",
+                                    data={"id": tool_call["id"], "name": tool_call["name"], "args": tool_call["args"]},
+                                )
+                        continue
+
+                    message, metadata = cast(tuple[BaseMessageChunk | ToolMessage, dict[str, Any]], chunk)
+                    if metadata["langgraph_node"] == "model":
+                        if text := self._extract_text_from_content(message.content):
+                            yield ChatEvent(event="token", data={"text": text})
+                    elif metadata["langgraph_node"] == "tools" and isinstance(message, ToolMessage):
+                        yield ChatEvent(
+                            event="tool_end",
+                            data={
+                                "id": message.tool_call_id,
+                                "name": tool_names.get(message.tool_call_id, message.name),
+                                "status": message.status,
+                            },
+                        )
+        self.summarizer.schedule(self.agent, thread_id)
+
+        yield ChatEvent(event="done")
 
 
 @lru_cache
 def get_chat_agent():
+    config = get_config()
+    model = get_llm_model()
     return ChatAgent(
-        model=get_llm_model(),
+        model=model,
         checkpointer=InMemorySaver(),
+        summarizer=ConversationSummarizer(
+            model=model,
+            max_tokens_before_summary=config.SUMMARY_MAX_TOKENS_BEFORE_SUMMARY,
+            messages_to_keep=config.SUMMARY_MESSAGES_TO_KEEP,
+        ),
     )
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+from collections import OrderedDict
+from collections.abc import Sequence
+from weakref import WeakValueDictionary
+
+from langchain_core.language_models import BaseChatModel
+from langchain_core.messages import AnyMessage, HumanMessage, RemoveMessage, get_buffer_string
+from langchain_core.messages.utils import count_tokens_approximately
+from langgraph.graph.state import CompiledStateGraph
+
+from ..utils.telemetry import span
+
+SUMMARY_PROMPT = """
+你是一個對話摘要助理。
+以下是目前為止的對話摘要，以及之後新增的對話內容。
+請將新增內容整合進摘要，產生一份更新後的摘要。
+
+【規則】
+- 保留使用者的身分、偏好、提供過的檔案與資料、已完成的工具操作與其結果。
+- 省略寒暄與重複內容。
+- 只輸出更新後的摘要本身，不要加上任何前言或說明。
+
+【目前摘要】
+{summary}
+
+【新增對話】
+{messages}
+"""
+
+SUMMARY_PREFIX = "以下是先前對話的摘要：\n\n"
+
+# token 數快取最多保留的 thread 數
+MAX_CACHED_THREADS = 1024
+
+
+class ConversationSummarizer:
+    """對話結束後，於背景增量更新對話摘要"""
+
+    def __init__(
+        self,
+        *,
+        model: BaseChatModel,
+        max_tokens_before_summary: int,
+        messages_to_keep: int,
+    ) -> None:
+        self.model = model
+        self.max_tokens_before_summary = max_tokens_before_summary
+        self.messages_to_keep = messages_to_keep
+        self._token_counts: OrderedDict[str, dict[str, int]] = OrderedDict()
+        self._locks: WeakValueDictionary[str, asyncio.Lock] = WeakValueDictionary()
+        self._tasks: dict[str, asyncio.Task[None]] = {}
+
+    def thread_lock(self, thread_id: str) -> asyncio.Lock:
+        # 同一個 thread 的對話與摘要寫入須互斥，避免覆寫彼此的 checkpoint
+        lock = self._locks.get(thread_id)
+        if lock is None:
+            lock = asyncio.Lock()
+            self._locks[thread_id] = lock
+        return lock
+
+    def schedule(self, agent: CompiledStateGraph, thread_id: str) -> None:
+        # 同一個 thread 同時只會有一個摘要任務
+        if (task := self._tasks.get(thread_id)) is not None and not task.done():
+            return
+
+        task = asyncio.create_task(self._run(agent, thread_id))
+        self._tasks[thread_id] = task
+        task.add_done_callback(lambda task: self._discard_task(thread_id, task))
+
+    def _discard_task(self, thread_id: str, task: asyncio.Task[None]) -> None:
+        # done callback 延後執行，期間可能已排入新任務；只移除完成的那一個
+        if self._tasks.get(thread_id) is task:
+            del self._tasks[thread_id]
+
+    async def _run(self, agent: CompiledStateGraph, thread_id: str) -> None:
+        try:
+            await self.asummarize(agent, thread_id)
+        except Exception:
+            logging.exception(f"Summarizer: failed on thread {thread_id}")
+
+    async def asummarize(self, agent: CompiledStateGraph, thread_id: str) -> None:
+        config = {"configurable": {"thread_id": thread_id}}
+        snapshot = await agent.aget_state(config)  # pyright: ignore[reportArgumentType]
+        messages: list[AnyMessage] = snapshot.values.get("messages", [])
+
+        if self._count_tokens(thread_id, messages) < self.max_tokens_before_summary:
+            return
+
+        cutoff_index = self._find_cutoff_index(messages)
+        summary_message = messages[0] if messages and self._is_summary(messages[0]) else None
+        new_messages = messages[1:cutoff_index] if summary_message else messages[:cutoff_index]
+
+        if not new_messages:
+            return
+
+        logging.info(f"Summarizer: folding {len(new_messages)} messages into summary of thread {thread_id}")
+
+        # LLM 呼叫不持有鎖，讓下一輪對話不必等待摘要完成
+        with span("summary"):
+            summary = await self._acreate_summary(summary_message, new_messages)
+
+        # 摘要失敗時保留原本的對話，避免清空歷史
+        if not summary:
+            logging.warning(f"Summarizer: model returned no summary for thread {thread_id}, skipped")
+            return
+
+        # 以 id 取代 / 移除訊息，不影響摘要期間新增的訊息
+        replaced = summary_message or new_messages[0]
+        removed = new_messages if summary_message else new_messages[1:]
+        update = [
+            HumanMessage(
+                content=SUMMARY_PREFIX + summary,
+                id=replaced.id,
+                response_metadata={"summary": True},
+            ),
+            *(RemoveMessage(id=message.id) for message in removed if message.id),
+        ]
+
+        async with self.thread_lock(thread_id):
+            await agent.aupdate_state(config, {"messages": update})  # pyright: ignore[reportArgumentType]
+
+    async def _acreate_summary(
+        self, summary_message: AnyMessage | None, new_messages: Sequence[AnyMessage]
+    ) -> str | None:
+        previous = summary_message.text.removeprefix(SUMMARY_PREFIX) if summary_message else "（無）"
+        prompt = SUMMARY_PROMPT.format(summary=previous, messages=get_buffer_string(new_messages))
+        response = await self.model.ainvoke(prompt)
+
+        # 呼叫工具或被阻擋的回應不是有效的摘要
+        if getattr(response, "tool_calls", None):
+            return None
+        return response.text.strip() or None
+
+    def _count_tokens(self, thread_id: str, messages: Sequence[AnyMessage]) -> int:
+        # 每則訊息的 token 數只計算一次；快取依 thread 分開，只保留目前仍存在的訊息與最近使用的 thread
+        cached = self._token_counts.pop(thread_id, {})
+        token_counts: dict[str, int] = {}
+        total = 0
+        for message in messages:
+            if message.id is None:
+                total += count_tokens_approximately([message])
+                continue
+            if message.id not in token_counts:
+                token_counts[message.id] = cached.get(message.id) or count_tokens_approximately([message])
+            total += token_counts[message.id]
+
+        self._token_counts[thread_id] = token_counts
+        while len(self._token_counts) > MAX_CACHED_THREADS:
+            self._token_counts.popitem(last=False)
+        return total
+
+    def _find_cutoff_index(self, messages: Sequence[AnyMessage]) -> int:
+        # 只在 HumanMessage 之前切割，確保 AI / Tool 訊息配對不會被拆開
+        for i in range(len(messages) - self.messages_to_keep, 0, -1):
+            if isinstance(messages[i], HumanMessage) and not self._is_summary(messages[i]):
+                return i
+        return 0
+
+    def _is_summary(self, message: AnyMessage) -> bool:
+        return isinstance(message, HumanMessage) and bool(message.response_metadata.get("summary"))
@@ -1,4 +1,5 @@
 import logging
+from functools import lru_cache
 from typing import Any
 
 import requests
@@ -11,6 +12,7 @@ from pydantic import BaseModel, Field
 from ..database.vectordb import get_vector_db
 from ..services.document import get_document_service
 from ..utils.misc import geocode
+from ..utils.telemetry import DOCUMENT_CHUNKS, span
 from .types import ChatContext, ChatState
 
 
@@ -44,6 +46,15 @@ class WeatherQueryInput(BaseModel):
     )
 
 
+@lru_cache
+def get_text_splitter() -> RecursiveCharacterTextSplitter:
+    return RecursiveCharacterTextSplitter(
+        chunk_size=200,
+        chunk_overlap=20,
+        add_start_index=True,
+    )
+
+
 @tool
 async def save_memory(
     runtime: ToolRuntime[ChatContext, ChatState],
@@ -55,19 +66,18 @@ async def save_memory(
     files = runtime.context.document_files
     vector_db = get_vector_db()
     document_service = get_document_service()
-    text_splitter = RecursiveCharacterTextSplitter(
-        chunk_size=200,
-        chunk_overlap=20,
-        add_start_index=True,
-    )
+    text_splitter = get_text_splitter()
 
     try:
         assert files is not None
         docs = await document_service.load_documents(files)
         logging.info(f"Tool [save_memory]: total {len(docs)} docs")
-        splits = text_splitter.split_documents(docs)
+        with span("memory.split"):
+            splits = text_splitter.split_documents(docs)
         logging.info(f"Tool [save_memory]: created {len(splits)} splits")
-        await vector_db.store.aadd_documents(splits)
+        with span("vectordb.add"):
+            await vector_db.store.aadd_documents(splits)
+        DOCUMENT_CHUNKS.inc(len(splits))
     except Exception:
         new_state: ChatState = {
             "messages": [ToolMessage("Fail: 使用者沒有傳入檔案", tool_call_id=tool_call_id)],
@@ -83,20 +93,24 @@ async def save_memory(
 @tool
 async def search_memory(
     runtime: ToolRuntime[ChatContext, ChatState],
-    query: str,
+    queries: list[str],
 ) -> Command:
-    """從向量資料庫做 RAG 查詢"""
+    """從向量資料庫做 RAG 查詢，問題涉及多個主題時，請一次傳入多個查詢"""
     logging.info("Tool [search_memory]: triggered")
+    logging.info(f"Tool [search_memory]: {queries=}")
 
     tool_call_id = runtime.tool_call_id
     vector_db = get_vector_db()
 
-    results = await vector_db.store.asimilarity_search(query, k=4)
+    results = await vector_db.abatch_similarity_search(queries, k=4)
+
+    # 不同查詢可能命中相同片段，去除重複內容
+    contents = list(dict.fromkeys(doc.page_content for docs in results for doc in docs))
 
-    if not results:
+    if not contents:
         new_state = {"messages": [ToolMessage("Fail: 知識庫中找不到與問題相關的內容", tool_call_id=tool_call_id)]}
     else:
-        memory = "\n".join(doc.page_content for doc in results)
+        memory = "\n".join(contents)
         new_state = {"messages": [ToolMessage(f"Success: {memory}", tool_call_id=tool_call_id)]}
 
     return Command(update=new_state)
@@ -1,8 +1,14 @@
+from collections.abc import Awaitable, Callable
 from dataclasses import dataclass
 
 from fastapi import UploadFile
 from langchain.agents import AgentState
-from langchain.agents.middleware import AgentMiddleware
+from langchain.agents.middleware import AgentMiddleware, ModelRequest, ModelResponse
+from langchain_core.messages import AIMessage, ToolMessage
+from langgraph.prebuilt.tool_node import ToolCallRequest
+from langgraph.types import Command
+
+from ..utils.telemetry import LLM_TOKENS, span
 
 
 @dataclass
@@ -13,4 +19,30 @@ class ChatContext:
 class ChatState(AgentState): ...
 
 
-class ChatMiddleware(AgentMiddleware[ChatState, ChatContext]): ...
+class ChatMiddleware(AgentMiddleware[ChatState, ChatContext]):
+    async def awrap_model_call(
+        self,
+        request: ModelRequest,
+        handler: Callable[[ModelRequest], Awaitable[ModelResponse]],
+    ) -> ModelResponse:
+        with span("llm"):
+            response = await handler(request)
+
+        for message in response.result:
+            # 快取命中時 langchain 會將 total_cost 設為 0，這些 token 並未實際消耗
+            if isinstance(message, AIMessage) and message.usage_metadata and not self._is_cache_hit(message):
+                LLM_TOKENS.labels("input").inc(message.usage_metadata.get("input_tokens", 0))
+                LLM_TOKENS.labels("output").inc(message.usage_metadata.get("output_tokens", 0))
+
+        return response
+
+    def _is_cache_hit(self, message: AIMessage) -> bool:
+        return message.usage_metadata is not None and dict(message.usage_metadata).get("total_cost") == 0
+
+    async def awrap_tool_call(
+        self,
+        request: ToolCallRequest,
+        handler: Callable[[ToolCallRequest], Awaitable[ToolMessage | Command]],
+    ) -> ToolMessage | Command:
+        with span(f"tool.{request.tool_call['name']}"):
+            return await handler(request)
@@ -27,6 +27,28 @@ class Config(BaseSettings):
     GROQ_API_KEY: SecretStr | None = None
     OLLAMA_BASE_URL: str | None = None
 
+    # telemetry
+    OTEL_EXPORTER_OTLP_ENDPOINT: str | None = None
+
+    # debugging
+    LOOP_LAG_MONITOR_ENABLED: bool = False
+    LOOP_LAG_THRESHOLD: float = 0.1
+    PROFILING_ENABLED: bool = False
+
+    # streaming
+    SSE_FLUSH_INTERVAL: float = 0.05
+    SSE_HEARTBEAT_INTERVAL: float = 15.0
+
+    # conversation summary
+    SUMMARY_MAX_TOKENS_BEFORE_SUMMARY: int = 1000
+    SUMMARY_MESSAGES_TO_KEEP: int = 5
+
+    # llm cache
+    LLM_CACHE_ENABLED: bool = False
+    LLM_CACHE_PATH: str = ".cache/llm_cache.sqlite3"
+    LLM_CACHE_TTL: int | None = 24 * 60 * 60
+    LLM_CACHE_MAX_ENTRIES: int | None = 10_000
+
     # .env
     model_config = SettingsConfigDict(env_file=".env", env_file_encoding="utf-8", extra="ignore")
 
@@ -1,9 +1,13 @@
+import asyncio
 from abc import ABC, abstractmethod
 from functools import cached_property
 
+from langchain_core.documents import Document
 from langchain_core.embeddings import Embeddings
 from langchain_core.vectorstores import VectorStore
 
+from ..utils.telemetry import span
+
 
 class VectorDatabase(ABC):
     def __init__(
@@ -32,3 +36,18 @@ class VectorDatabase(ABC):
 
     @abstractmethod
     def destroy_store(self) -> None: ...
+
+    async def aembed_queries(self, queries: list[str]) -> list[list[float]]:
+        # 並行以 query 模式取得向量；aembed_documents 在部分 provider 會使用 document 模式，不可混用
+        with span("embedding.query", count=len(queries)):
+            return list(await asyncio.gather(*(self.embedding_model.aembed_query(query) for query in queries)))
+
+    async def abatch_similarity_search(self, queries: list[str], k: int = 4) -> list[list[Document]]:
+        # 預設實作：並行 embedding 後並行查詢，子類別可改用資料庫原生的批次查詢
+        embeddings = await self.aembed_queries(queries)
+        with span("vectordb.search", provider=type(self).__name__):
+            return list(
+                await asyncio.gather(
+                    *(self.store.asimilarity_search_by_vector(embedding, k=k) for embedding in embeddings)
+                )
+            )
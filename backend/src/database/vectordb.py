@@ -1,10 +1,14 @@
 from __future__ import annotations
 
+import asyncio
 from functools import cached_property, lru_cache
 from typing import TYPE_CHECKING
 
+from langchain_core.documents import Document
+
 from ..config import get_config
 from ..model.embedding import get_embedding_model
+from ..utils.telemetry import span
 from .base import VectorDatabase
 
 if TYPE_CHECKING:
@@ -73,6 +77,31 @@ class QdrantDatabase(VectorDatabase):
             embedding=self.embedding_model,
         )
 
+    async def abatch_similarity_search(self, queries: list[str], k: int = 4) -> list[list[Document]]:
+        from langchain_qdrant import QdrantVectorStore  # pyright: ignore[reportMissingImports]
+        from qdrant_client import models  # pyright: ignore[reportMissingImports]
+
+        embeddings = await self.aembed_queries(queries)
+
+        # Qdrant 原生批次查詢：一次請求完成所有向量搜尋
+        with span("vectordb.search", provider=type(self).__name__):
+            responses = await asyncio.to_thread(
+                self.client.query_batch_points,
+                collection_name=self.collection_name,
+                requests=[models.QueryRequest(query=embedding, limit=k, with_payload=True) for embedding in embeddings],
+            )
+
+        return [
+            [
+                Document(
+                    page_content=(point.payload or {}).get(QdrantVectorStore.CONTENT_KEY, ""),
+                    metadata=(point.payload or {}).get(QdrantVectorStore.METADATA_KEY) or {},
+                )
+                for point in response.points
+            ]
+            for response in responses
+        ]
+
     def destroy_store(self) -> None:
         # delete collection
         self.client.delete_collection(self.collection_name)
@@ -81,6 +110,18 @@ class QdrantDatabase(VectorDatabase):
         self._store = None
 
 
+class InMemoryVectorDatabase(VectorDatabase):
+    def init_store(self) -> None:
+        from langchain_core.vectorstores import InMemoryVectorStore
+
+        # create store
+        self._store = InMemoryVectorStore(embedding=self.embedding_model)
+
+    def destroy_store(self) -> None:
+        # delete store
+        self._store = None
+
+
 @lru_cache
 def get_vector_db() -> VectorDatabase:
     db_url = get_config().VECTOR_DB_URL
@@ -101,6 +142,12 @@ def get_vector_db() -> VectorDatabase:
             collection_name=db_collection_name,
             embedding_model=get_embedding_model(),
         )
+    elif db_provider == "memory":
+        vector_db = InMemoryVectorDatabase(
+            db_url=db_url,
+            collection_name=db_collection_name,
+            embedding_model=get_embedding_model(),
+        )
     else:
         raise ValueError(f"Unsupported vector database provider: {db_provider}")
 
@@ -0,0 +1,226 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+import warnings
+from collections.abc import Sequence
+from dataclasses import asdict, dataclass
+from functools import lru_cache
+from pathlib import Path
+from typing import Any
+
+from langchain_core._api import LangChainBetaWarning
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatGeneration
+
+from ..config import get_config
+from ..utils.telemetry import LLM_CACHE_EVENTS
+
+# 正規化 prompt 時，移除每次呼叫都會變動、且不影響模型輸出的欄位
+_VOLATILE_MESSAGE_FIELDS = ("id", "response_metadata", "usage_metadata")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    skips: int = 0
+    evictions: int = 0
+    entries: int = 0
+
+
+class SQLiteLLMCache(BaseCache):
+    def __init__(
+        self,
+        db_path: str,
+        *,
+        ttl: float | None = None,
+        max_entries: int | None = None,
+    ) -> None:
+        self.db_path = db_path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._stats = CacheStats()
+        self._lock = threading.Lock()
+
+        if db_path != ":memory:":
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+
+        self._conn = sqlite3.connect(db_path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_cache (
+                key TEXT PRIMARY KEY,
+                value TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS idx_llm_cache_accessed_at ON llm_cache (accessed_at)")
+        self._conn.commit()
+
+    @property
+    def stats(self) -> CacheStats:
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+            return CacheStats(**{**asdict(self._stats), "entries": entries})
+
+    def lookup(self, prompt: str, llm_string: str) -> RETURN_VAL_TYPE | None:
+        messages = self._normalize_prompt(prompt)
+        if messages is None or not self._is_cacheable_prompt(messages):
+            with self._lock:
+                self._stats.skips += 1
+            LLM_CACHE_EVENTS.labels("skip").inc()
+            return None
+
+        key = self._make_key(messages, llm_string)
+        now = time.time()
+
+        with self._lock:
+            row = self._conn.execute("SELECT value, created_at FROM llm_cache WHERE key = ?", (key,)).fetchone()
+
+            if row is None:
+                self._stats.misses += 1
+                LLM_CACHE_EVENTS.labels("miss").inc()
+                return None
+
+            value, created_at = row
+
+            # 過期：視為未命中並刪除
+            if self.ttl is not None and now - created_at > self.ttl:
+                self._conn.execute("DELETE FROM llm_cache WHERE key = ?", (key,))
+                self._conn.commit()
+                self._stats.misses += 1
+                LLM_CACHE_EVENTS.labels("miss").inc()
+                return None
+
+            self._conn.execute("UPDATE llm_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self._conn.commit()
+            self._stats.hits += 1
+            LLM_CACHE_EVENTS.labels("hit").inc()
+
+        # loads 為 beta API，每次呼叫都會發出 LangChainBetaWarning
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", LangChainBetaWarning)
+            return [loads(gen) for gen in json.loads(value)]
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE) -> None:
+        messages = self._normalize_prompt(prompt)
+        if messages is None or not self._is_cacheable_prompt(messages) or not self._is_cacheable_result(return_val):
+            return
+
+        key = self._make_key(messages, llm_string)
+        value = json.dumps([dumps(gen) for gen in self._strip_message_ids(return_val)])
+        now = time.time()
+
+        with self._lock:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, value, created_at, accessed_at) VALUES (?, ?, ?, ?)",
+                (key, value, now, now),
+            )
+            self._evict()
+            self._conn.commit()
+
+    def clear(self, **kwargs: Any) -> None:
+        with self._lock:
+            self._conn.execute("DELETE FROM llm_cache")
+            self._conn.commit()
+            self._stats = CacheStats()
+
+    def _evict(self) -> None:
+        # 呼叫端需持有 self._lock
+        if self.ttl is not None:
+            cursor = self._conn.execute("DELETE FROM llm_cache WHERE created_at < ?", (time.time() - self.ttl,))
+            self._stats.evictions += cursor.rowcount
+
+        if self.max_entries is not None:
+            # 超過上限時，淘汰最久未使用 (LRU) 的項目
+            cursor = self._conn.execute(
+                """
+                DELETE FROM llm_cache WHERE key IN (
+                    SELECT key FROM llm_cache ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._stats.evictions += cursor.rowcount
+
+    def _normalize_prompt(self, prompt: str) -> list[dict[str, Any]] | None:
+        # prompt 為 langchain dumps(messages) 的結果
+        try:
+            messages = json.loads(prompt)
+        except json.JSONDecodeError:
+            return None
+
+        if not isinstance(messages, list):
+            return None
+
+        for message in messages:
+            kwargs = message.get("kwargs", {}) if isinstance(message, dict) else {}
+            for field in _VOLATILE_MESSAGE_FIELDS:
+                kwargs.pop(field, None)
+
+        return messages
+
+    def _is_cacheable_prompt(self, messages: list[dict[str, Any]]) -> bool:
+        for message in messages:
+            message_type = message.get("id", [""])[-1]
+            kwargs = message.get("kwargs", {})
+
+            # 工具呼叫回合：結果依賴外部狀態，不快取
+            if message_type in ("ToolMessage", "ToolMessageChunk") or kwargs.get("tool_calls"):
+                return False
+
+            # 圖片回合：payload 大且幾乎不會重複，不快取
+            content = kwargs.get("content")
+            if isinstance(content, list):
+                for part in content:
+                    if isinstance(part, dict) and part.get("type") in ("image_url", "image"):
+                        return False
+
+        return True
+
+    def _is_cacheable_result(self, return_val: RETURN_VAL_TYPE) -> bool:
+        for gen in return_val:
+            if not isinstance(gen, ChatGeneration):
+                return False
+            if getattr(gen.message, "tool_calls", None):
+                return False
+        return True
+
+    def _strip_message_ids(self, return_val: RETURN_VAL_TYPE) -> Sequence[ChatGeneration]:
+        # 移除 message id，避免快取命中時不同對話共用同一個 id
+        # 移除 usage_metadata，避免快取命中被計為實際消耗的 token
+        generations: list[ChatGeneration] = []
+        for gen in return_val:
+            assert isinstance(gen, ChatGeneration)
+            update: dict[str, Any] = {"id": None}
+            if isinstance(gen.message, AIMessage):
+                update["usage_metadata"] = None
+            message = gen.message.model_copy(update=update)
+            generations.append(gen.model_copy(update={"message": message}))
+        return generations
+
+    def _make_key(self, messages: list[dict[str, Any]], llm_string: str) -> str:
+        # llm_string 已包含 model、provider 與綁定的 tool schema
+        payload = json.dumps(messages, sort_keys=True, ensure_ascii=False) + "---" + llm_string
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+@lru_cache
+def get_llm_cache() -> SQLiteLLMCache | None:
+    config = get_config()
+
+    if not config.LLM_CACHE_ENABLED:
+        return None
+
+    return SQLiteLLMCache(
+        db_path=config.LLM_CACHE_PATH,
+        ttl=config.LLM_CACHE_TTL,
+        max_entries=config.LLM_CACHE_MAX_ENTRIES,
+    )
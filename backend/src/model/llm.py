@@ -4,6 +4,7 @@ from typing import cast
 from langchain_core.language_models import BaseChatModel
 
 from ..config import get_config
+from .cache import get_llm_cache
 
 
 @lru_cache
@@ -40,4 +41,7 @@ def get_llm_model() -> BaseChatModel:
     else:
         raise ValueError(f"Unsupported chat provider: {provider}")
 
+    if (llm_cache := get_llm_cache()) is not None:
+        llm.cache = llm_cache
+
     return cast(BaseChatModel, llm)
@@ -1,5 +1,21 @@
+from typing import Any, Literal
+
 from pydantic import BaseModel
 
 
 class ChatResponse(BaseModel):
     answer: str
+
+
+class ChatEvent(BaseModel):
+    event: Literal["token", "tool_start", "tool_end", "done", "error"]
+    data: dict[str, Any] = {}
+
+
+class CacheStatsResponse(BaseModel):
+    enabled: bool
+    hits: int = 0
+    misses: int = 0
+    skips: int = 0
+    evictions: int = 0
+    entries: int = 0
@@ -8,6 +8,8 @@ from langchain_core.document_loaders import Blob
 from langchain_core.documents import Document
 from pypdf import PdfReader
 
+from ..utils.telemetry import DOCUMENT_BYTES, DOCUMENT_PAGES, span
+
 MimeHandler = Callable[[Blob], list[Document]]
 
 
@@ -38,7 +40,9 @@ class DocumentService:
         return docs
 
     async def file_to_blob(self, file: UploadFile) -> Blob:
-        data = await file.read()
+        with span("document.read"):
+            data = await file.read()
+        DOCUMENT_BYTES.inc(len(data))
 
         return Blob.from_data(
             data=data,
@@ -69,7 +73,11 @@ class DocumentService:
         if handler is None:
             raise ValueError(f"No handler for MIME type: {mime!r}")
 
-        return handler(blob)
+        with span("document.parse", mime=mime):
+            docs = handler(blob)
+        DOCUMENT_PAGES.inc(len(docs))
+
+        return docs
 
     def _handle_pdf(self, blob: Blob) -> list[Document]:
         pdf_bytes = blob.as_bytes()
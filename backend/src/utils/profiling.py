@@ -0,0 +1,162 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+import uuid
+from collections import Counter, OrderedDict
+from functools import lru_cache
+from types import FrameType
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from .telemetry import EVENT_LOOP_LAG
+
+
+class LoopLagMonitor:
+    """偵測 event loop 被阻塞的情況，並記錄造成阻塞的 stack trace"""
+
+    def __init__(self, *, threshold: float, interval: float = 0.05) -> None:
+        self.threshold = threshold
+        self.interval = interval
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id: int | None = None
+        self._task: asyncio.Task[None] | None = None
+        self._watchdog: threading.Thread | None = None
+        self._stopped = threading.Event()
+
+    def start(self) -> None:
+        self._loop_thread_id = threading.get_ident()
+        self._heartbeat = time.monotonic()
+        self._stopped.clear()
+        self._task = asyncio.create_task(self._beat())
+        self._watchdog = threading.Thread(target=self._watch, name="loop-lag-watchdog", daemon=True)
+        self._watchdog.start()
+        logging.info(f"LoopLagMonitor: started (threshold={self.threshold}s)")
+
+    async def stop(self) -> None:
+        self._stopped.set()
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+        if self._watchdog is not None:
+            await asyncio.to_thread(self._watchdog.join)
+
+    async def _beat(self) -> None:
+        # 在 event loop 中定期更新心跳，並量測實際延遲
+        while True:
+            expected = time.monotonic() + self.interval
+            await asyncio.sleep(self.interval)
+            now = time.monotonic()
+            EVENT_LOOP_LAG.observe(max(now - expected, 0))
+            self._heartbeat = now
+
+    def _watch(self) -> None:
+        # 在獨立 thread 檢查心跳；loop 被阻塞時擷取 loop thread 當下的 stack，恢復後再記錄完整的阻塞時間
+        stalled_since: float | None = None
+        stack = ""
+        while not self._stopped.wait(self.interval):
+            heartbeat = self._heartbeat
+
+            if stalled_since is None:
+                if time.monotonic() - heartbeat - self.interval >= self.threshold:
+                    stalled_since = heartbeat
+                    frame = sys._current_frames().get(self._loop_thread_id or 0)
+                    stack = "".join(traceback.format_stack(frame)) if frame else "<unavailable>"
+                continue
+
+            # 心跳已更新：loop 恢復運作
+            if heartbeat != stalled_since:
+                lag = heartbeat - stalled_since - self.interval
+                logging.warning(f"LoopLagMonitor: event loop blocked for {lag:.3f}s\n{stack}")
+                stalled_since = None
+
+
+class SamplingProfiler:
+    """定期取樣指定 thread 的 stack，輸出 collapsed stack (flamegraph) 格式"""
+
+    def __init__(self, *, interval: float = 0.005, thread_id: int | None = None) -> None:
+        self.interval = interval
+        self.thread_id = thread_id or threading.get_ident()
+        self.samples: Counter[str] = Counter()
+        self._stopped = threading.Event()
+        self._sampler: threading.Thread | None = None
+
+    def start(self) -> None:
+        self._stopped.clear()
+        self._sampler = threading.Thread(target=self._sample, name="sampling-profiler", daemon=True)
+        self._sampler.start()
+
+    def stop(self) -> None:
+        self._stopped.set()
+        if self._sampler is not None:
+            self._sampler.join()
+
+    def collapsed(self) -> str:
+        return "".join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
+
+    def _sample(self) -> None:
+        while not self._stopped.wait(self.interval):
+            if (frame := sys._current_frames().get(self.thread_id)) is not None:
+                self.samples[self._collapse(frame)] += 1
+
+    def _collapse(self, frame: FrameType | None) -> str:
+        names: list[str] = []
+        while frame is not None:
+            code = frame.f_code
+            names.append(f"{code.co_qualname} ({code.co_filename}:{frame.f_lineno})")
+            frame = frame.f_back
+        return ";".join(reversed(names))
+
+
+class ProfileStore:
+    """保存最近的 profiling 結果"""
+
+    def __init__(self, max_size: int = 20) -> None:
+        self.max_size = max_size
+        self._profiles: OrderedDict[str, str] = OrderedDict()
+
+    def add(self, profile: str, profile_id: str | None = None) -> str:
+        profile_id = profile_id or uuid.uuid4().hex
+        self._profiles[profile_id] = profile
+        while len(self._profiles) > self.max_size:
+            self._profiles.popitem(last=False)
+        return profile_id
+
+    def get(self, profile_id: str) -> str | None:
+        return self._profiles.get(profile_id)
+
+
+class ProfilingMiddleware:
+    """取樣帶有 X-Profile header 的請求（含串流 body），並以 X-Profile-Id 回傳結果 id"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http" or not any(name == b"x-profile" for name, _ in scope["headers"]):
+            await self.app(scope, receive, send)
+            return
+
+        # 串流回應的 header 會先送出，因此預先產生 id
+        profile_id = uuid.uuid4().hex
+
+        async def send_wrapper(message: Message) -> None:
+            if message["type"] == "http.response.start":
+                MutableHeaders(scope=message).append("X-Profile-Id", profile_id)
+            await send(message)
+
+        profiler = SamplingProfiler()
+        profiler.start()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            profiler.stop()
+            get_profile_store().add(profiler.collapsed(), profile_id=profile_id)
+
+
+@lru_cache
+def get_profile_store() -> ProfileStore:
+    return ProfileStore()
@@ -0,0 +1,100 @@
+import asyncio
+import contextlib
+import json
+import logging
+from collections.abc import AsyncGenerator, AsyncIterator
+
+import anyio
+from fastapi import Request
+
+from ..schemas import ChatEvent
+
+_STREAM_END = object()
+
+
+def format_sse(event: ChatEvent) -> bytes:
+    data = json.dumps(event.data, ensure_ascii=False)
+    return f"event: {event.event}\ndata: {data}\n\n".encode()
+
+
+def _format_tokens(pending_tokens: list[str]) -> bytes:
+    data = format_sse(ChatEvent(event="token", data={"text": "".join(pending_tokens)}))
+    pending_tokens.clear()
+    return data
+
+
+def _format_item(item: ChatEvent | BaseException | object) -> bytes:
+    if isinstance(item, ChatEvent):
+        return format_sse(item)
+    logging.error(f"SSE: agent run failed: {item!r}")
+    return format_sse(ChatEvent(event="error", data={"message": str(item)}))
+
+
+async def _produce(events: AsyncIterator[ChatEvent], queue: asyncio.Queue) -> None:
+    try:
+        async for event in events:
+            await queue.put(event)
+    except Exception as err:
+        await queue.put(err)
+    finally:
+        await queue.put(_STREAM_END)
+
+
+async def sse_stream(
+    events: AsyncIterator[ChatEvent],
+    request: Request,
+    *,
+    flush_interval: float,
+    heartbeat_interval: float,
+) -> AsyncGenerator[bytes]:
+    """將 ChatEvent 轉為 SSE：合併短時間內的 token、定時送出 heartbeat、斷線時取消 agent"""
+    queue: asyncio.Queue[ChatEvent | BaseException | object] = asyncio.Queue()
+    producer = asyncio.create_task(_produce(events, queue))
+    loop = asyncio.get_running_loop()
+    pending_tokens: list[str] = []
+    flush_deadline: float | None = None
+    last_sent = loop.time()
+
+    try:
+        while True:
+            now = loop.time()
+            deadline = last_sent + heartbeat_interval if flush_deadline is None else flush_deadline
+
+            try:
+                item = await asyncio.wait_for(queue.get(), timeout=max(deadline - now, 0))
+            except TimeoutError:
+                # 每次 flush / heartbeat 前檢查連線，token 持續產生時也能及早停止
+                if await request.is_disconnected():
+                    logging.info("SSE: client disconnected, cancelling agent run")
+                    return
+                if pending_tokens:
+                    # flush window 到期：一次送出累積的 token
+                    yield _format_tokens(pending_tokens)
+                    flush_deadline = None
+                else:
+                    yield b": heartbeat\n\n"
+                last_sent = loop.time()
+                continue
+
+            if isinstance(item, ChatEvent) and item.event == "token":
+                pending_tokens.append(item.data.get("text", ""))
+                if flush_deadline is None:
+                    flush_deadline = loop.time() + flush_interval
+                continue
+
+            # 非 token 事件前，先送出累積的 token 以保持順序
+            if pending_tokens:
+                yield _format_tokens(pending_tokens)
+                flush_deadline = None
+
+            if item is _STREAM_END:
+                return
+
+            yield _format_item(item)
+            last_sent = loop.time()
+    finally:
+        # 用戶端已離開（或串流結束）時，停止 agent 避免浪費 LLM 運算
+        # 斷線時 Starlette 已取消外層 scope，須 shield 才能等到 agent 真正結束
+        producer.cancel()
+        with anyio.CancelScope(shield=True), contextlib.suppress(asyncio.CancelledError):
+            await producer
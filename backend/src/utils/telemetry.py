@@ -0,0 +1,128 @@
+import logging
+import time
+from collections.abc import Iterator
+from contextlib import contextmanager
+from typing import Any
+
+from prometheus_client import Counter, Histogram
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+STAGE_DURATION = Histogram(
+    "memorypilot_stage_duration_seconds",
+    "Duration of each processing stage",
+    ["stage"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60),
+)
+STAGE_ERRORS = Counter(
+    "memorypilot_stage_errors_total",
+    "Number of failed processing stages",
+    ["stage"],
+)
+HTTP_REQUEST_DURATION = Histogram(
+    "memorypilot_http_request_duration_seconds",
+    "Duration of HTTP requests",
+    ["method", "path", "status"],
+)
+LLM_TOKENS = Counter(
+    "memorypilot_llm_tokens_total",
+    "Number of LLM tokens",
+    ["type"],
+)
+LLM_CACHE_EVENTS = Counter(
+    "memorypilot_llm_cache_events_total",
+    "Number of LLM cache lookups",
+    ["result"],
+)
+DOCUMENT_BYTES = Counter(
+    "memorypilot_document_bytes_total",
+    "Number of uploaded document bytes read",
+)
+DOCUMENT_PAGES = Counter(
+    "memorypilot_document_pages_total",
+    "Number of documents (pages) parsed",
+)
+DOCUMENT_CHUNKS = Counter(
+    "memorypilot_document_chunks_total",
+    "Number of chunks stored in the vector database",
+)
+
+EVENT_LOOP_LAG = Histogram(
+    "memorypilot_event_loop_lag_seconds",
+    "Delay between scheduled and actual event loop wake-ups",
+    buckets=(0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5),
+)
+
+_tracer: Any = None
+
+
+def setup_tracing(endpoint: str | None, service_name: str = "memorypilot-backend") -> None:
+    """設定 OpenTelemetry exporter，未指定 endpoint 時不啟用"""
+    global _tracer
+
+    if not endpoint:
+        return
+
+    try:
+        from opentelemetry import trace  # pyright: ignore[reportMissingImports]
+        from opentelemetry.exporter.otlp.proto.http.trace_exporter import (  # pyright: ignore[reportMissingImports]
+            OTLPSpanExporter,
+        )
+        from opentelemetry.sdk.resources import Resource  # pyright: ignore[reportMissingImports]
+        from opentelemetry.sdk.trace import TracerProvider  # pyright: ignore[reportMissingImports]
+        from opentelemetry.sdk.trace.export import BatchSpanProcessor  # pyright: ignore[reportMissingImports]
+    except ImportError:
+        logging.warning("Telemetry: opentelemetry packages are not installed, tracing disabled")
+        return
+
+    provider = TracerProvider(resource=Resource.create({"service.name": service_name}))
+    provider.add_span_processor(BatchSpanProcessor(OTLPSpanExporter(endpoint=f"{endpoint.rstrip('/')}/v1/traces")))
+    trace.set_tracer_provider(provider)
+    _tracer = trace.get_tracer(service_name)
+    logging.info(f"Telemetry: exporting traces to {endpoint}")
+
+
+@contextmanager
+def span(stage: str, **attributes: Any) -> Iterator[None]:
+    """計時一個處理階段：記錄到 Prometheus histogram，並在啟用時產生 OpenTelemetry span"""
+    start = time.perf_counter()
+    otel_span = _tracer.start_as_current_span(stage, attributes=attributes) if _tracer is not None else None
+
+    try:
+        if otel_span is None:
+            yield
+        else:
+            with otel_span:
+                yield
+    except Exception:
+        STAGE_ERRORS.labels(stage).inc()
+        raise
+    finally:
+        STAGE_DURATION.labels(stage).observe(time.perf_counter() - start)
+
+
+class RequestDurationMiddleware:
+    """記錄 HTTP 請求耗時；串流回應計算到 body 傳送完畢為止"""
+
+    def __init__(self, app: ASGIApp) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        start = time.perf_counter()
+        status_code = 500
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            # 以路由樣板作為 label，避免 label 數量無限增長
+            path = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUEST_DURATION.labels(scope["method"], path, status_code).observe(time.perf_counter() - start)